@@ -1,15 +1,27 @@
 from __future__ import annotations
 
-import hashlib
+import functools
 import json
+import math
 import random
+import zlib
 from dataclasses import dataclass
-from datetime import datetime, time, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
+from enum import IntEnum
 from typing import Any, Dict, Optional
 
-from zoneinfo import ZoneInfo
+# Japan has no DST, so a fixed offset matches Asia/Tokyo without zoneinfo lookups.
+JST = timezone(timedelta(hours=9), "JST")
 
-JST = ZoneInfo("Asia/Tokyo")
+
+class ShiftPhase(IntEnum):
+    LUNCH = 0
+    OFF_SHIFT = 1
+    STARTUP = 2
+    NORMAL_MORNING = 3
+    LATE_MORNING = 4
+    AFTERNOON = 5
+    OTHER = 6
 
 
 @dataclass(frozen=True)
@@ -22,6 +34,14 @@ class LineConfig:
     power_range_w: tuple[int, int]
     vibration_range: tuple[float, float]
 
+    # Cached in the instance __dict__, so it is derived once per config and
+    # always matches this config's own cycle range.
+    @functools.cached_property
+    def startup_cycle_time_range_ms(self) -> tuple[int, int]:
+        min_ms, max_ms = self.cycle_time_range_ms
+        range_padding = int((max_ms - min_ms) * 0.3)
+        return max(500, min_ms - range_padding), max_ms + range_padding
+
 
 LINE_CONFIGS = {
     "L1": LineConfig(
@@ -53,10 +73,30 @@ LINE_CONFIGS = {
     ),
 }
 
+
 MACHINE_IDS = [f"M0{index}" for index in range(1, 7)]
 MATERIAL_REFILL_TARGETS = {"M02", "M03"}
+# Every (line, machine) slot in payload order, with its full "L1-M01" style id.
+FLAT_MACHINES = [
+    (line, machine_id, f"{line.line_id}-{machine_id}")
+    for line in LINE_CONFIGS.values()
+    for machine_id in MACHINE_IDS
+]
+FLAT_MACHINE_IDS = [machine_id for _, machine_id, _ in FLAT_MACHINES]
+LINE_SLICES = [
+    (line, slice(index * len(MACHINE_IDS), (index + 1) * len(MACHINE_IDS)))
+    for index, line in enumerate(LINE_CONFIGS.values())
+]
 
 ALARM_CODES = ["Q001", "Q002", "M001", "T001", "V001"]
+ALARM_REASONS = (
+    "quality_issue",
+    "quality_issue",
+    "machine_fault",
+    "over_temp",
+    "high_vibration",
+)
+ALARM_RATE_PER_SEC = 0.2 / 86400
 ALARM_SEVERITY_WEIGHTS = [(1, 0.6), (2, 0.3), (3, 0.1)]
 
 INTERVAL_WEIGHTS = [
@@ -68,27 +108,126 @@ INTERVAL_WEIGHTS = [
     (600, 0.01),
 ]
 
+SHIFT_START_MIN = 9 * 60
+STARTUP_END_MIN = 9 * 60 + 30
+LUNCH_START_MIN = 12 * 60
+LUNCH_END_MIN = 12 * 60 + 15
+LATE_MORNING_END_MIN = 13 * 60
+AFTERNOON_END_MIN = 15 * 60 + 30
+SHIFT_END_MIN = 18 * 60
+
+STATUS_REASONS = {
+    "RUN": "normal_run",
+    "IDLE": "end_of_shift",
+    "STOP": "material_wait",
+    "CHANGEOVER": "changeover",
+    "MAINT": "planned_maintenance",
+}
+
+STARTUP_STATUS_WEIGHTS = [
+    ("RUN", 0.6),
+    ("IDLE", 0.2),
+    ("STOP", 0.1),
+    ("CHANGEOVER", 0.05),
+    ("MAINT", 0.05),
+]
+PRODUCTION_STATUS_WEIGHTS = [
+    ("RUN", 0.85),
+    ("IDLE", 0.05),
+    ("STOP", 0.05),
+    ("CHANGEOVER", 0.03),
+    ("MAINT", 0.02),
+]
+LATE_MORNING_STATUS_WEIGHTS = [
+    ("RUN", 0.7),
+    ("IDLE", 0.2),
+    ("STOP", 0.05),
+    ("CHANGEOVER", 0.03),
+    ("MAINT", 0.02),
+]
+DEFAULT_STATUS_WEIGHTS = [
+    ("RUN", 0.8),
+    ("IDLE", 0.1),
+    ("STOP", 0.05),
+    ("CHANGEOVER", 0.03),
+    ("MAINT", 0.02),
+]
+
+
+LOOKUP_TABLE_SIZE = 1000
+
+
+def lookup_table(options: list[tuple[Any, float]]) -> tuple[tuple[Any, ...], bytes]:
+    values = tuple(value for value, _ in options)
+    slots = [round(weight * LOOKUP_TABLE_SIZE) for _, weight in options]
+    if sum(slots) != LOOKUP_TABLE_SIZE:
+        raise ValueError("weights must sum to 1.0 in steps of 0.001")
+    table = bytes(index for index, count in enumerate(slots) for _ in range(count))
+    return values, table
+
+
+def status_table(
+    options: list[tuple[str, float]]
+) -> tuple[tuple[str, ...], tuple[str, ...], bytes]:
+    statuses, table = lookup_table(options)
+    reasons = tuple(STATUS_REASONS[status] for status in statuses)
+    return statuses, reasons, table
+
+
+INTERVAL_VALUES, INTERVAL_TABLE = lookup_table(INTERVAL_WEIGHTS)
+ALARM_PROBABILITIES = {
+    interval: ALARM_RATE_PER_SEC * interval for interval in INTERVAL_VALUES
+}
+ALARM_SEVERITY_VALUES, ALARM_SEVERITY_TABLE = lookup_table(ALARM_SEVERITY_WEIGHTS)
+STARTUP_STATUSES = status_table(STARTUP_STATUS_WEIGHTS)
+PRODUCTION_STATUSES = status_table(PRODUCTION_STATUS_WEIGHTS)
+LATE_MORNING_STATUSES = status_table(LATE_MORNING_STATUS_WEIGHTS)
+DEFAULT_STATUSES = status_table(DEFAULT_STATUS_WEIGHTS)
+PHASE_STATUSES = {
+    ShiftPhase.STARTUP: STARTUP_STATUSES,
+    ShiftPhase.NORMAL_MORNING: PRODUCTION_STATUSES,
+    ShiftPhase.LATE_MORNING: LATE_MORNING_STATUSES,
+    ShiftPhase.AFTERNOON: PRODUCTION_STATUSES,
+    ShiftPhase.OTHER: DEFAULT_STATUSES,
+}
+
+
+# json.dumps builds a new encoder per call whenever options are passed.
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+# Fixes the key order; payloads copy it and assign only non-default fields.
+MACHINE_PAYLOAD_TEMPLATE: Dict[str, Any] = {
+    "machineId": None,
+    "status": None,
+    "reason": None,
+    "goodCountDelta": 0,
+    "ngCountDelta": 0,
+    "runTimeSecDelta": 0,
+    "idleTimeSecDelta": 0,
+    "stopTimeSecDelta": 0,
+    "cycleTimeMs": None,
+    "sensors": None,
+}
+
 
 def now_jst() -> datetime:
     return datetime.now(timezone.utc).astimezone(JST)
 
 
 def select_interval_sec(rng: random.Random) -> int:
-    roll = rng.random()
-    cumulative = 0.0
-    for interval, weight in INTERVAL_WEIGHTS:
-        cumulative += weight
-        if roll <= cumulative:
-            return interval
-    return INTERVAL_WEIGHTS[-1][0]
+    return weighted_choice(rng, INTERVAL_VALUES, INTERVAL_TABLE)
 
 
 def seed_from_string(seed: str) -> int:
-    return int(hashlib.sha256(seed.encode("utf-8")).hexdigest(), 16) % (2**32)
+    # Only needs to be stable and well mixed, not cryptographic.
+    return zlib.crc32(seed.encode("utf-8"))
 
 
 def jst_time_in_range(target: datetime, start: time, end: time) -> bool:
-    target_time = target.timetz()
+    # Compare naive wall-clock times; an offset-aware time() from a fixed-offset
+    # tzinfo cannot be ordered against the naive bounds.
+    target_time = target.time()
     if start <= end:
         return start <= target_time < end
     return target_time >= start or target_time < end
@@ -118,124 +257,98 @@ def is_afternoon(current: datetime) -> bool:
     return jst_time_in_range(current, time(13, 0), time(15, 30))
 
 
-def is_material_refill_window(current: datetime, machine_id: str) -> bool:
-    if machine_id not in MATERIAL_REFILL_TARGETS:
-        return False
-    base_date = current.date()
+# Only the current day's windows are queried, so a small cache is enough.
+@functools.lru_cache(maxsize=8)
+def material_refill_window(base_date: date, machine_id: str) -> tuple[int, int]:
     seed = seed_from_string(f"{base_date.isoformat()}-{machine_id}-refill")
     rng = random.Random(seed)
     start_offset_min = rng.randint(0, 2)
     duration_min = rng.randint(3, 7)
-    start_time = datetime.combine(base_date, time(15, 30), tzinfo=JST) + timedelta(
-        minutes=start_offset_min
-    )
-    end_time = start_time + timedelta(minutes=duration_min)
-    return start_time <= current < end_time
+    base_ts = int(datetime.combine(base_date, time(15, 30), tzinfo=JST).timestamp())
+    start_ts = base_ts + start_offset_min * 60
+    end_ts = start_ts + duration_min * 60
+    return start_ts, end_ts
+
+
+def classify_shift(current: datetime) -> ShiftPhase:
+    # Same boundaries as the is_* predicates, compared as minutes of the day.
+    minute_of_day = current.hour * 60 + current.minute
+    if minute_of_day < SHIFT_START_MIN or minute_of_day >= SHIFT_END_MIN:
+        return ShiftPhase.OFF_SHIFT
+    if minute_of_day < STARTUP_END_MIN:
+        return ShiftPhase.STARTUP
+    if minute_of_day < LUNCH_START_MIN:
+        return ShiftPhase.NORMAL_MORNING
+    if minute_of_day < LUNCH_END_MIN:
+        return ShiftPhase.LUNCH
+    if minute_of_day < LATE_MORNING_END_MIN:
+        return ShiftPhase.LATE_MORNING
+    if minute_of_day < AFTERNOON_END_MIN:
+        return ShiftPhase.AFTERNOON
+    return ShiftPhase.OTHER
 
 
-def choose_alarm(rng: random.Random, interval_sec: int) -> Optional[Dict[str, Any]]:
-    per_second_rate = 0.2 / 86400
-    probability = per_second_rate * interval_sec
+def is_material_refill_window(current: datetime, machine_id: str) -> bool:
+    if machine_id not in MATERIAL_REFILL_TARGETS:
+        return False
+    # Refill windows always fall between 15:30 and 15:39.
+    if current.hour != 15:
+        return False
+    start_ts, end_ts = material_refill_window(current.date(), machine_id)
+    return start_ts <= current.timestamp() < end_ts
+
+
+def choose_alarm(rng: random.Random, probability: float) -> Optional[Dict[str, Any]]:
     if rng.random() >= probability:
         return None
-    alarm_code = rng.choice(ALARM_CODES)
-    severity = weighted_choice(rng, ALARM_SEVERITY_WEIGHTS)
+    code_index = rng.randrange(len(ALARM_CODES))
+    severity = weighted_choice(rng, ALARM_SEVERITY_VALUES, ALARM_SEVERITY_TABLE)
     duration_sec = rng.randint(30, 120)
     return {
-        "alarmCode": alarm_code,
+        "alarmCode": ALARM_CODES[code_index],
+        "reason": ALARM_REASONS[code_index],
         "severity": severity,
         "durationSec": duration_sec,
     }
 
 
-def weighted_choice(rng: random.Random, options: list[tuple[Any, float]]) -> Any:
-    roll = rng.random()
-    cumulative = 0.0
-    for value, weight in options:
-        cumulative += weight
-        if roll <= cumulative:
-            return value
-    return options[-1][0]
-
-
-def select_status(
-    rng: random.Random, current: datetime, machine_id: str
-) -> tuple[str, str]:
-    if is_lunch_break(current):
-        return "IDLE", "lunch_break"
-    if is_off_shift(current):
-        if rng.random() < 0.1:
-            return "RUN", "normal_run"
-        return "IDLE", "off_shift"
-    if is_material_refill_window(current, machine_id):
-        return "STOP", "material_refill"
-    if is_startup(current):
-        return weighted_status(
-            rng,
-            [
-                ("RUN", 0.6),
-                ("IDLE", 0.2),
-                ("STOP", 0.1),
-                ("CHANGEOVER", 0.05),
-                ("MAINT", 0.05),
-            ],
-        )
-    if is_normal_morning(current) or is_afternoon(current):
-        return weighted_status(
-            rng,
-            [
-                ("RUN", 0.85),
-                ("IDLE", 0.05),
-                ("STOP", 0.05),
-                ("CHANGEOVER", 0.03),
-                ("MAINT", 0.02),
-            ],
-        )
-    if is_late_morning(current):
-        return weighted_status(
-            rng,
-            [
-                ("RUN", 0.7),
-                ("IDLE", 0.2),
-                ("STOP", 0.05),
-                ("CHANGEOVER", 0.03),
-                ("MAINT", 0.02),
-            ],
-        )
-    return weighted_status(
-        rng,
-        [
-            ("RUN", 0.8),
-            ("IDLE", 0.1),
-            ("STOP", 0.05),
-            ("CHANGEOVER", 0.03),
-            ("MAINT", 0.02),
-        ],
-    )
-
-
-def weighted_status(
-    rng: random.Random, options: list[tuple[str, float]]
-) -> tuple[str, str]:
-    status = weighted_choice(rng, options)
-    reason = {
-        "RUN": "normal_run",
-        "IDLE": "end_of_shift",
-        "STOP": "material_wait",
-        "CHANGEOVER": "changeover",
-        "MAINT": "planned_maintenance",
-    }[status]
-    return status, reason
-
-
-def compute_cycle_time_ms(
-    rng: random.Random, line: LineConfig, current: datetime
-) -> int:
-    min_ms, max_ms = line.cycle_time_range_ms
-    if is_startup(current):
-        range_padding = int((max_ms - min_ms) * 0.3)
-        min_ms = max(500, min_ms - range_padding)
-        max_ms = max_ms + range_padding
+def weighted_index(rng: random.Random, table: bytes) -> int:
+    return table[int(rng.random() * LOOKUP_TABLE_SIZE)]
+
+
+def weighted_choice(rng: random.Random, values: tuple[Any, ...], table: bytes) -> Any:
+    return values[weighted_index(rng, table)]
+
+
+def select_statuses(
+    rng: random.Random, phase: ShiftPhase, current: datetime, machine_ids: list[str]
+) -> list[tuple[str, str]]:
+    if phase == ShiftPhase.LUNCH:
+        return [("IDLE", "lunch_break")] * len(machine_ids)
+    if phase == ShiftPhase.OFF_SHIFT:
+        return [
+            ("RUN", "normal_run") if rng.random() < 0.1 else ("IDLE", "off_shift")
+            for _ in machine_ids
+        ]
+
+    # Every machine shares the phase distribution, so draw them all in one pass.
+    statuses, reasons, table = PHASE_STATUSES[phase]
+    indices = [weighted_index(rng, table) for _ in machine_ids]
+    selected = [(statuses[index], reasons[index]) for index in indices]
+
+    # Refill windows (15:30-15:39) always fall inside the OTHER phase.
+    if phase == ShiftPhase.OTHER:
+        for slot, machine_id in enumerate(machine_ids):
+            if is_material_refill_window(current, machine_id):
+                selected[slot] = ("STOP", "material_refill")
+    return selected
+
+
+def compute_cycle_time_ms(rng: random.Random, line: LineConfig, startup: bool) -> int:
+    if startup:
+        min_ms, max_ms = line.startup_cycle_time_range_ms
+    else:
+        min_ms, max_ms = line.cycle_time_range_ms
     return rng.randint(min_ms, max_ms)
 
 
@@ -247,11 +360,28 @@ def generate_counts(
 ) -> tuple[int, int]:
     expected_cycles = interval_sec * 1000 / cycle_time_ms
     sample_cycles = max(0, int(rng.normalvariate(expected_cycles, expected_cycles * 0.05)))
-    ng_count = sum(1 for _ in range(sample_cycles) if rng.random() < ng_rate)
+    ng_count = sample_binomial(rng, sample_cycles, ng_rate)
     good_count = max(sample_cycles - ng_count, 0)
     return good_count, ng_count
 
 
+def sample_binomial(rng: random.Random, trials: int, probability: float) -> int:
+    if trials <= 0 or probability <= 0.0:
+        return 0
+    if probability >= 1.0:
+        return trials
+    # Jump between successes with geometric gaps so the cost scales with the
+    # number of successes rather than the number of trials.
+    log_failure = math.log1p(-probability)
+    successes = 0
+    position = 0
+    while True:
+        position += int(math.log(1.0 - rng.random()) / log_failure) + 1
+        if position > trials:
+            return successes
+        successes += 1
+
+
 def generate_sensors(
     rng: random.Random,
     line: LineConfig,
@@ -281,69 +411,56 @@ def generate_sensors(
         elif alarm_code == "M001":
             power = rng.uniform(power_max * 1.3, power_max * 1.8)
 
+    # Readings are never negative, so adding 0.5 and truncating rounds them
+    # without the overhead of round(x, ndigits).
     return {
-        "temperatureC": round(temperature, 2),
-        "powerW": round(power, 1),
-        "vibration": round(vibration, 3),
+        "temperatureC": int(temperature * 100 + 0.5) / 100,
+        "powerW": int(power * 10 + 0.5) / 10,
+        "vibration": int(vibration * 1000 + 0.5) / 1000,
     }
 
 
 def generate_machine_payload(
     rng: random.Random,
-    current: datetime,
+    phase: ShiftPhase,
     interval_sec: int,
+    alarm_probability: float,
     line: LineConfig,
-    machine_id: str,
+    full_id: str,
+    status: str,
+    reason: str,
 ) -> Dict[str, Any]:
-    status, reason = select_status(rng, current, machine_id)
     alarm = None
     if status != "IDLE":
-        alarm = choose_alarm(rng, interval_sec)
+        alarm = choose_alarm(rng, alarm_probability)
     if alarm:
         status = "ALARM"
-        reason_map = {
-            "Q001": "quality_issue",
-            "Q002": "quality_issue",
-            "M001": "machine_fault",
-            "T001": "over_temp",
-            "V001": "high_vibration",
-        }
-        reason = reason_map[alarm["alarmCode"]]
+        reason = alarm["reason"]
 
-    run_time = idle_time = stop_time = 0
-    if status == "RUN":
-        run_time = interval_sec
-    elif status == "IDLE":
-        idle_time = interval_sec
-    else:
-        stop_time = interval_sec
+    payload = MACHINE_PAYLOAD_TEMPLATE.copy()
+    payload["machineId"] = full_id
+    payload["status"] = status
+    payload["reason"] = reason
 
-    cycle_time_ms = None
-    good_count = 0
-    ng_count = 0
     if status == "RUN":
-        cycle_time_ms = compute_cycle_time_ms(rng, line, current)
+        payload["runTimeSecDelta"] = interval_sec
+        startup = phase == ShiftPhase.STARTUP
+        cycle_time_ms = compute_cycle_time_ms(rng, line, startup)
         ng_rate = line.ng_rate
-        if is_startup(current):
+        if startup:
             ng_rate *= 2
         if alarm and alarm["alarmCode"] in {"Q001", "Q002"}:
             ng_rate *= rng.uniform(1.5, 3.0)
         good_count, ng_count = generate_counts(rng, interval_sec, cycle_time_ms, ng_rate)
+        payload["goodCountDelta"] = good_count
+        payload["ngCountDelta"] = ng_count
+        payload["cycleTimeMs"] = cycle_time_ms
+    elif status == "IDLE":
+        payload["idleTimeSecDelta"] = interval_sec
+    else:
+        payload["stopTimeSecDelta"] = interval_sec
 
-    sensors = generate_sensors(rng, line, status, alarm)
-
-    payload: Dict[str, Any] = {
-        "machineId": f"{line.line_id}-{machine_id}",
-        "status": status,
-        "reason": reason,
-        "goodCountDelta": good_count,
-        "ngCountDelta": ng_count,
-        "runTimeSecDelta": run_time,
-        "idleTimeSecDelta": idle_time,
-        "stopTimeSecDelta": stop_time,
-        "cycleTimeMs": cycle_time_ms,
-        "sensors": sensors,
-    }
+    payload["sensors"] = generate_sensors(rng, line, status, alarm)
 
     if alarm:
         payload["alarm"] = {
@@ -362,20 +479,32 @@ def generate_payload(
     if current is None:
         current = now_jst()
     interval_sec = select_interval_sec(rng)
+    # Everything derived from the interval and the clock is shared by all machines.
+    alarm_probability = ALARM_PROBABILITIES[interval_sec]
+    phase = classify_shift(current)
 
-    lines_payload = []
-    for line in LINE_CONFIGS.values():
-        machines_payload = [
-            generate_machine_payload(rng, current, interval_sec, line, machine_id)
-            for machine_id in MACHINE_IDS
-        ]
-        lines_payload.append(
-            {
-                "lineId": line.line_id,
-                "lineName": line.line_name,
-                "machines": machines_payload,
-            }
+    statuses = select_statuses(rng, phase, current, FLAT_MACHINE_IDS)
+    machines_payload = [
+        generate_machine_payload(
+            rng,
+            phase,
+            interval_sec,
+            alarm_probability,
+            line,
+            full_id,
+            status,
+            reason,
         )
+        for (line, _, full_id), (status, reason) in zip(FLAT_MACHINES, statuses)
+    ]
+    lines_payload = [
+        {
+            "lineId": line.line_id,
+            "lineName": line.line_name,
+            "machines": machines_payload[line_slice],
+        }
+        for line, line_slice in LINE_SLICES
+    ]
 
     return {
         "schemaVersion": "1.0",
@@ -387,4 +516,4 @@ def generate_payload(
 
 
 def to_json(payload: Dict[str, Any]) -> str:
-    return json.dumps(payload, ensure_ascii=False)
+    return JSON_ENCODER.encode(payload)
@@ -1,5 +1,4 @@
 import ctypes
-import json
 import logging
 import os
 import time
@@ -11,6 +10,9 @@ logger.setLevel(logging.INFO)
 
 LIBSORATUN_FILENAME = "libsoratun.so"
 DEFAULT_ARC_CONFIG = "arc.json"
+SEND_METHOD = ctypes.c_char_p(b"POST")
+SEND_PATH = ctypes.c_char_p(b"/")
+RETRY_BACKOFFS = [0.5, 1.0, 2.0]
 
 
 def _load_soratun():
@@ -34,33 +36,48 @@ def _load_arc_config() -> ctypes.c_char_p:
         return ctypes.c_char_p(file.read().encode("utf-8"))
 
 
+# Load once per container so warm invocations skip the dlopen and file read.
+# Missing files are tolerated here so the module can be imported without them
+# (e.g. in tests); lambda_handler retries the load and surfaces the error.
+try:
+    _SORATUN = _load_soratun()
+except OSError:
+    _SORATUN = None
+try:
+    _ARC_CONFIG = _load_arc_config()
+except OSError:
+    _ARC_CONFIG = None
+
+
 def _send_with_retry(
     soratun, config: ctypes.c_char_p, payload_json: str, max_attempts: int = 3
 ) -> str:
-    method = ctypes.c_char_p(b"POST")
-    path = ctypes.c_char_p(b"/")
+    # Encode once; the same buffer is reused for every attempt.
     body = ctypes.c_char_p(payload_json.encode("utf-8"))
-    backoffs = [0.5, 1.0, 2.0]
 
     for attempt in range(1, max_attempts + 1):
-        response_ptr = soratun.Send(config, method, path, body)
+        response_ptr = soratun.Send(config, SEND_METHOD, SEND_PATH, body)
         if response_ptr is not None:
             return response_ptr.decode("utf-8")
         if attempt < max_attempts:
-            sleep_for = backoffs[attempt - 1] + (0.1 * attempt)
+            sleep_for = RETRY_BACKOFFS[attempt - 1] + (0.1 * attempt)
             logger.warning("Send failed, retrying in %.2fs", sleep_for)
             time.sleep(sleep_for)
     raise RuntimeError("Failed to send payload via libsoratun after retries")
 
 
 def lambda_handler(event, context):
-    soratun = _load_soratun()
-    config = _load_arc_config()
+    global _SORATUN, _ARC_CONFIG
+    if _SORATUN is None:
+        _SORATUN = _load_soratun()
+    if _ARC_CONFIG is None:
+        _ARC_CONFIG = _load_arc_config()
     payload = generate_payload()
     payload_json = to_json(payload)
 
-    response_body = _send_with_retry(soratun, config, payload_json)
-    logger.info("Sent payload: %s", json.dumps(payload, ensure_ascii=False))
+    response_body = _send_with_retry(_SORATUN, _ARC_CONFIG, payload_json)
+    logger.info("Sent payload (%d chars)", len(payload_json))
+    logger.debug("Sent payload: %s", payload_json)
     logger.info("Unified Endpoint response: %s", response_body)
 
     return {
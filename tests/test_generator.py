@@ -1,9 +1,29 @@
+import dataclasses
 import random
 import unittest
-from datetime import datetime
+from datetime import date, datetime
 from zoneinfo import ZoneInfo
 
-from demodata_sender.generator import generate_payload
+from demodata_sender import generator
+from demodata_sender.generator import (
+    LINE_CONFIGS,
+    LOOKUP_TABLE_SIZE,
+    MACHINE_IDS,
+    ShiftPhase,
+    classify_shift,
+    compute_cycle_time_ms,
+    generate_payload,
+    is_afternoon,
+    is_late_morning,
+    is_lunch_break,
+    is_normal_morning,
+    is_off_shift,
+    is_startup,
+    lookup_table,
+    material_refill_window,
+    sample_binomial,
+    select_statuses,
+)
 
 JST = ZoneInfo("Asia/Tokyo")
 
@@ -41,6 +61,103 @@ class TestGenerator(unittest.TestCase):
                 )
                 self.assertEqual(total, payload["intervalSec"])
 
+    def test_sample_binomial(self):
+        rng = random.Random(2)
+        self.assertEqual(sample_binomial(rng, 0, 0.5), 0)
+        self.assertEqual(sample_binomial(rng, 100, 0.0), 0)
+        self.assertEqual(sample_binomial(rng, 100, 1.0), 100)
+
+        draws = [sample_binomial(rng, 1000, 0.01) for _ in range(2000)]
+        self.assertTrue(all(0 <= draw <= 1000 for draw in draws))
+        self.assertAlmostEqual(sum(draws) / len(draws), 10.0, delta=0.5)
+
+    def test_lookup_table(self):
+        values, table = lookup_table([("a", 0.7), ("b", 0.25), ("c", 0.05)])
+        self.assertEqual(values, ("a", "b", "c"))
+        self.assertEqual(len(table), LOOKUP_TABLE_SIZE)
+        self.assertEqual(table.count(0), 700)
+        self.assertEqual(table.count(1), 250)
+        self.assertEqual(table.count(2), 50)
+
+        with self.assertRaises(ValueError):
+            lookup_table([("a", 0.5), ("b", 0.4)])
+
+    def test_classify_shift(self):
+        expected = [
+            ((8, 59), ShiftPhase.OFF_SHIFT),
+            ((9, 0), ShiftPhase.STARTUP),
+            ((9, 30), ShiftPhase.NORMAL_MORNING),
+            ((12, 0), ShiftPhase.LUNCH),
+            ((12, 15), ShiftPhase.LATE_MORNING),
+            ((13, 0), ShiftPhase.AFTERNOON),
+            ((15, 30), ShiftPhase.OTHER),
+            ((18, 0), ShiftPhase.OFF_SHIFT),
+        ]
+        for (hour, minute), phase in expected:
+            current = datetime(2024, 5, 1, hour, minute, tzinfo=JST)
+            self.assertEqual(classify_shift(current), phase, (hour, minute))
+
+    def test_shift_helpers_match_classify_shift(self):
+        helpers = {
+            ShiftPhase.LUNCH: is_lunch_break,
+            ShiftPhase.OFF_SHIFT: is_off_shift,
+            ShiftPhase.STARTUP: is_startup,
+            ShiftPhase.NORMAL_MORNING: is_normal_morning,
+            ShiftPhase.LATE_MORNING: is_late_morning,
+            ShiftPhase.AFTERNOON: is_afternoon,
+        }
+        for minute_of_day in range(24 * 60):
+            current = datetime(
+                2024, 5, 1, minute_of_day // 60, minute_of_day % 60, tzinfo=JST
+            )
+            phase = classify_shift(current)
+            for helper_phase, helper in helpers.items():
+                self.assertEqual(helper(current), helper_phase == phase, current)
+
+    def test_shift_helpers_accept_aware_datetimes(self):
+        for tzinfo in (JST, generator.JST):
+            lunch = datetime(2024, 5, 1, 12, 5, tzinfo=tzinfo)
+            self.assertTrue(is_lunch_break(lunch))
+            self.assertFalse(is_off_shift(lunch))
+
+            night = datetime(2024, 5, 1, 2, 0, tzinfo=tzinfo)
+            self.assertFalse(is_lunch_break(night))
+            self.assertTrue(is_off_shift(night))
+
+        current = generator.now_jst()
+        self.assertEqual(
+            is_off_shift(current), classify_shift(current) == ShiftPhase.OFF_SHIFT
+        )
+
+    def test_startup_cycle_time_uses_the_given_config(self):
+        line = LINE_CONFIGS["L1"]
+        self.assertEqual(line.startup_cycle_time_range_ms, (2200, 3800))
+
+        custom = dataclasses.replace(line, cycle_time_range_ms=(10000, 20000))
+        self.assertEqual(custom.startup_cycle_time_range_ms, (7000, 23000))
+        rng = random.Random(4)
+        for _ in range(100):
+            self.assertGreaterEqual(compute_cycle_time_ms(rng, custom, True), 7000)
+
+    def test_material_refill_overrides_status(self):
+        windows = [
+            material_refill_window(date(2024, 5, 1), machine_id)
+            for machine_id in ("M02", "M03")
+        ]
+        start_ts = max(start for start, _ in windows)
+        self.assertTrue(all(start_ts < end for _, end in windows))
+        current = datetime.fromtimestamp(start_ts, JST)
+        statuses = select_statuses(
+            random.Random(3), ShiftPhase.OTHER, current, MACHINE_IDS
+        )
+
+        self.assertEqual(len(statuses), len(MACHINE_IDS))
+        for machine_id, (status, reason) in zip(MACHINE_IDS, statuses):
+            if machine_id in {"M02", "M03"}:
+                self.assertEqual((status, reason), ("STOP", "material_refill"))
+            else:
+                self.assertNotEqual(reason, "material_refill")
+
 
 if __name__ == "__main__":
     unittest.main()